@@ -0,0 +1,184 @@
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from revi_toolbox.scraper.manga import MangabatsScraperRunner
+
+from shared.scraper_archive import PageArchiveReader, PageArchiveWriter, archive_slug, record_pages, serve_pages
+from shared.scraper_pipeline import run_pipeline
+
+from flows.manga.schemas import RawManga, RawMangaChapter
+
+
+ARCHIVE_MODES = (None, "record", "replay")
+LIVE_WORKERS = 8
+
+PageArchive = Optional[Union[PageArchiveWriter, PageArchiveReader]]
+
+
+# Parse (run in threads for live scraping, in process pool for replay, must be module-level)
+@contextmanager
+def _page_source(pages: Optional[Dict[str, dict]]) -> Iterator[None]:
+    if (pages is not None):
+        with serve_pages(pages):
+            yield
+    else:
+        yield
+
+
+def parse_overview(slug: str, pages: Optional[Dict[str, dict]] = None) -> RawManga:
+    """
+    Scrape and re-format Manga overview per slug
+
+    params:
+        - slug: str. Slug (or Code) for Manga
+        - pages: dict[str, dict]. (default: None). Archived pages to be parsed (None to fetch from MangaBats)
+
+    return:
+        Manga scraping results
+    """
+    with _page_source(pages):
+        overview = MangabatsScraperRunner().scrape_overview(slug)
+
+    author_list = ";".join(sorted(overview.authors))
+    genre_list = ";".join(sorted(overview.genres))
+    is_completed = "TRUE" if (overview.is_completed) else "FALSE"
+
+    m = RawManga.model_validate({
+        "author_list": author_list,
+        "genre_list": genre_list,
+        "is_completed": is_completed,
+        **overview.model_dump(include=["code", "title"])
+    })
+    return m
+
+
+def parse_chapters(slug: str, pages: Optional[Dict[str, dict]] = None) -> List[RawMangaChapter]:
+    """
+    Scrape and re-format Manga chapters per slug
+
+    params:
+        - slug: str. Slug (or Code) for Manga
+        - pages: dict[str, dict]. (default: None). Archived pages to be parsed (None to fetch from MangaBats)
+
+    return:
+        Manga chapter scraping results
+    """
+    with _page_source(pages):
+        chapters = MangabatsScraperRunner().scrape_chapters(slug)
+
+    ch_list = []
+    for chapter in chapters:
+        chapter_updated_at = chapter.updated_at.strftime("%Y-%m-%d %H:%M:%S")
+        ch = RawMangaChapter.model_validate({
+            "chapter_updated_at": chapter_updated_at,
+            **chapter.model_dump(include=["code", "chapter_title", "chapter_url"])
+        })
+        ch_list.append(ch)
+
+    return ch_list
+
+
+# Runner
+@contextmanager
+def open_page_archive(archive_mode: Optional[str], archive_path: str) -> Iterator[PageArchive]:
+    """
+    Open Page Archive based on archive mode
+
+    params:
+        - archive_mode: str. Page Archive mode, "record", "replay" or None (no archive)
+        - archive_path: str. Page Archive file path
+
+    return:
+        PageArchiveWriter for "record", PageArchiveReader for "replay", otherwise None
+    """
+    if (archive_mode not in ARCHIVE_MODES):
+        raise ValueError(f"Unknown archive mode: {archive_mode}")
+
+    if (archive_mode == "record"):
+        with record_pages(archive_path) as writer:
+            yield writer
+    elif (archive_mode == "replay"):
+        with PageArchiveReader(archive_path) as reader:
+            yield reader
+    else:
+        yield None
+
+
+_live_pool: Optional[ThreadPoolExecutor] = None
+_live_pool_lock = threading.Lock()
+
+
+def get_live_pool() -> ThreadPoolExecutor:
+    """
+    Get thread pool for live scraping, shared by every batch in the process (caps requests to MangaBats)
+
+    return:
+        Thread pool sized to LIVE_WORKERS
+    """
+    global _live_pool
+    with _live_pool_lock:
+        if (_live_pool is None):
+            _live_pool = ThreadPoolExecutor(max_workers=LIVE_WORKERS)
+        return _live_pool
+
+
+def _scrape_live(slug: str, parse: Callable) -> Any:
+    with archive_slug(slug):
+        return parse(slug)
+
+
+def run_scraper(slug_list: List[str], parse: Callable, archive: PageArchive = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run MangaBats scraper for a batch of slug
+
+    MangabatsScraperRunner does its own requests, so fetch and parse can not be split for live
+    scraping: slug are fetched and parsed together in the live thread pool shared by every batch
+    (at most LIVE_WORKERS slug in flight), so live runs get no CPU parallelism. Pages are recorded
+    when a Page Archive is being recorded. When replaying, archived pages are read in threads and
+    parsed in the process pool (see `run_pipeline`).
+
+    params:
+        - slug_list: list[str]. List of slug (or Code) for Manga
+        - parse: Callable. Parse function (`parse_overview` or `parse_chapters`)
+        - archive: PageArchiveWriter | PageArchiveReader. (default: None). Page Archive being recorded or to replay from
+
+    return:
+        Parse results per slug, and error message per failed slug
+    """
+    if (isinstance(archive, PageArchiveReader)):
+        outputs = run_pipeline(slug_list, archive.get_pages, parse, return_exceptions=True)
+    else:
+        live_pool = get_live_pool()
+        futures = [live_pool.submit(_scrape_live, slug, parse) for slug in slug_list]
+        outputs = [f.exception() or f.result() for f in futures]
+
+    results, errors = {}, {}
+    for slug, output in zip(slug_list, outputs):
+        if (isinstance(output, Exception)):
+            errors[slug] = f"{type(output).__name__}: {output}"
+        else:
+            results[slug] = output
+
+    return results, errors
+
+
+def merge_batch_results(batch_results: List[Tuple[Dict[str, Any], Dict[str, str]]]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Merge `run_scraper` outputs from every batch
+
+    params:
+        - batch_results: list. List of (results, errors) per batch
+
+    return:
+        Parse results per slug, and error message per failed slug
+    """
+    results, errors = {}, {}
+    for batch_result, batch_error in batch_results:
+        results.update(batch_result)
+        errors.update(batch_error)
+
+    for slug, error in errors.items():
+        print(f"Failed scraping {slug}: {error}")
+    return results, errors
@@ -1,35 +1,61 @@
 import os
+import json
+import time
 import itertools
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from revi_toolbox.adapters import PostgreAdapter
-from revi_toolbox.scraper.manga import MangabatsScraperRunner
 
-from prefect import flow, task
+from prefect import flow, task, unmapped
 
 from prefect.variables import Variable
 from prefect.blocks.system import Secret
 
+from shared.scraper_archive import get_archive_path
 from shared.scraper_logs import load_log
-from shared.macro import gen_job_id, get_query
+from shared.macro import chunk_list, gen_job_id, get_query
 
-from flows.manga.schemas import RawMangaChapter
+from flows.manga.mangabats import PageArchive, merge_batch_results, open_page_archive, parse_chapters, run_scraper
+from flows.manga.schemas import MangaScrapeStat, RawMangaChapter
 
 
 QUERY_DIR = os.path.join(os.path.dirname(__file__), "sql")
 
+# Adaptive Schedule (in seconds)
+CADENCE_WINDOW = 10
+MIN_CHECK_INTERVAL = 60 * 60
+MAX_CHECK_INTERVAL = 24 * 60 * 60
+DORMANT_CHECK_INTERVAL = 3 * 24 * 60 * 60
+COMPLETED_CHECK_INTERVAL = 7 * 24 * 60 * 60
+DORMANT_AFTER = 30 * 24 * 60 * 60
+EXPECTED_WINDOW = 0.25
+CHECK_TOLERANCE = 10 * 60
+
 
 # Flow
 @flow(
     name = "manga_mangabats_scraper_chapters",
     log_prints = True
 )
-def main(slug_list: list[str]):
+def main(
+    slug_list: list[str],
+    archive_mode: Optional[str] = None,
+    archive_job_id: Optional[str] = None,
+    adaptive_schedule: bool = False,
+    batch_size: Optional[int] = None
+):
     """
     Flow: Running Scraper for MangaBats Manga Chapters
 
+    Live scraping runs fetch and parse together in threads (MangabatsScraperRunner can not be split),
+    so live runs get no CPU parallelism: parsing shares the GIL. Only "replay" parses in a process pool.
+
     params:
         - slug_list: list[str]. List of slug (or Code) for Manga
+        - archive_mode: str. (default: None). Page Archive mode, "record" to save fetched pages or "replay" to scrape from saved pages
+        - archive_job_id: str. (default: None). Job ID of archived run to be replayed (required for "replay" mode)
+        - adaptive_schedule: bool. (default: False). Only scrape slug that are due based on their update cadence (ignored for "replay" mode)
+        - batch_size: int. (default: None). Number of slug scraped per task run (None to scrape all slug in one task run)
     """
     # Init
     db_auth = Secret.load("scraper-db-auth").get()
@@ -38,44 +64,87 @@ def main(slug_list: list[str]):
 
     job_id = gen_job_id()
 
+    if (archive_mode == "replay" and not archive_job_id):
+        raise ValueError("archive_job_id is required for replay mode")
+    archive_dir = Variable.get("scraper_archive_dir", default="/data/archive")
+    archive_path = get_archive_path(archive_dir, "mangabats_scraper_chapters", archive_job_id if (archive_mode == "replay") else job_id)
+
+    cache_dir = Variable.get("scraper_cache_dir", default="/data/cache")
+    checks_path = os.path.join(cache_dir, "manga_chapter_checks.json")
+    checked_at = load_checked_at(checks_path)
+
+    # Task: fetch_due_slugs (replay scrapes every archived slug)
+    if (adaptive_schedule and archive_mode != "replay"):
+        slug_list = fetch_due_slugs(db, slug_list, checked_at)
+        if (not slug_list):
+            return
+
     # Task: scraping_manga
-    chapters = scraping_manga_chapters.map(slug_list).result()
-    flt_chapters = list(itertools.chain(*chapters))
+    with open_page_archive(archive_mode, archive_path) as archive:
+        batches = chunk_list(slug_list, batch_size or len(slug_list))
+        batch_results = scraping_manga_chapters.map(batches, unmapped(archive)).result()
+    chapters, errors = merge_batch_results(batch_results)
+    flt_chapters = list(itertools.chain(*chapters.values()))
     
     # Task: load_mangas
     manga_chapters = load_manga_chapters(db, flt_chapters, job_id)
 
+    # Mark successfully scraped and loaded slug as checked (including empty scrapes)
+    if (archive_mode != "replay"):
+        save_checked_at(checks_path, {**checked_at, **{slug: time.time() for slug in chapters}})
+
     # Task: log_scraper_runtime
     load_log(db, "scraper-chapters", "mangabats_manga_scraper_chapters", job_id, wait_for=[manga_chapters])
 
+    if (errors):
+        raise RuntimeError(f"Failed scraping {len(errors)} slug: [{', '.join(errors)}]")
+
 
 # Tasks
 @task(retries=0)
-def scraping_manga_chapters(slug: str) -> List[RawMangaChapter]:
+def fetch_due_slugs(db: PostgreAdapter, slug_list: List[str], checked_at: Dict[str, float]) -> List[str]:
     """
-    Task: Scraping Manga Chapters per slug
+    Task: Fetch slug that are due to be scraped based on Manga update cadence
 
     params:
-        - slug: str. Slug (or Code) for Manga
-    
+        - db: PostgreAdapter. Adapter for interacting with Postgre DB
+        - slug_list: list[str]. List of slug (or Code) for Manga
+        - checked_at: dict[str, float]. Last scrape time (epoch seconds) per slug
+
     return:
-        Manga scraping results
+        List of due slug
     """
-    # Scraping
-    scraper = MangabatsScraperRunner()
-    chapters = scraper.scrape_chapters(slug)
+    print(f"Fetch due slug from {len(slug_list)} slug")
+
+    # Prepare Query and Params
+    query = get_query(QUERY_DIR, "fetch_scrape_stats.sql")
+    params = {"code": list(slug_list), "window": CADENCE_WINDOW}
+
+    # Fetch Results
+    stats = [MangaScrapeStat.model_validate(r) for r in db.run_query(query, params)]
+    now = time.time()
+    due_slugs = [
+        st.code for st in stats
+        if (st.code not in checked_at) or (now - checked_at[st.code] + CHECK_TOLERANCE >= get_check_interval(st))
+    ]
+
+    print(f"Collected {len(due_slugs)} due slug: [{', '.join(due_slugs)}]")
+    return due_slugs
 
-    # Re-formatting
-    ch_list = []
-    for chapter in chapters:
-        chapter_updated_at = chapter.updated_at.strftime("%Y-%m-%d %H:%M:%S")
-        ch  = RawMangaChapter.model_validate({
-            "chapter_updated_at": chapter_updated_at,
-            **chapter.model_dump(include=["code", "chapter_title", "chapter_url"])
-        })
-        ch_list.append(ch)
 
-    return ch_list
+@task(retries=0)
+def scraping_manga_chapters(slug_list: List[str], archive: PageArchive = None) -> Tuple[Dict[str, List[RawMangaChapter]], Dict[str, str]]:
+    """
+    Task: Scraping Manga Chapters for a batch of slug (live: threads, no CPU parallelism; replay: parse in process pool)
+
+    params:
+        - slug_list: list[str]. List of slug (or Code) for Manga
+        - archive: PageArchiveWriter | PageArchiveReader. (default: None). Page Archive to record to or replay from
+    
+    return:
+        Manga scraping results per slug, and error message per failed slug
+    """
+    return run_scraper(slug_list, parse_chapters, archive)
 
 
 @task
@@ -96,6 +165,72 @@ def load_manga_chapters(db: PostgreAdapter, manga_chapters: List[RawMangaChapter
     _ = db.run_query(query, data)
 
 
+# Helpers
+def get_check_interval(stat: MangaScrapeStat) -> float:
+    """
+    Calculate interval between scraping for a Manga based on its update cadence
+
+    params:
+        - stat: MangaScrapeStat. Manga chapter and scraping statistic
+
+    return:
+        Check interval (in seconds)
+    """
+    if (stat.is_completed):
+        return COMPLETED_CHECK_INTERVAL
+    if (stat.chapter_count < 2 or not stat.avg_interval):
+        return MIN_CHECK_INTERVAL
+    if (stat.since_last_chapter > DORMANT_AFTER):
+        return DORMANT_CHECK_INTERVAL
+
+    # Check often only within a window around the expected next chapter
+    overdue = stat.since_last_chapter - stat.avg_interval
+    window = EXPECTED_WINDOW * stat.avg_interval
+    if (abs(overdue) <= window):
+        return MIN_CHECK_INTERVAL
+
+    # Back off while next chapter is still far away
+    if (overdue < 0):
+        return min(max(-overdue / 2, MIN_CHECK_INTERVAL), MAX_CHECK_INTERVAL)
+
+    # Back off further the more overdue the next chapter is
+    return min(max((overdue - window) / 2, MIN_CHECK_INTERVAL), DORMANT_CHECK_INTERVAL)
+
+
+def load_checked_at(path: str) -> Dict[str, float]:
+    """
+    Load last scrape time per slug
+
+    params:
+        - path: str. Scrape check file path
+
+    return:
+        Last scrape time (epoch seconds) per slug
+    """
+    if (not os.path.exists(path)):
+        return {}
+    try:
+        with open(path, "r") as file:
+            return {str(k): float(v) for k, v in json.load(file).items()}
+    except (ValueError, TypeError, AttributeError):
+        return {}
+
+
+def save_checked_at(path: str, checked_at: Dict[str, float]):
+    """
+    Save last scrape time per slug
+
+    params:
+        - path: str. Scrape check file path
+        - checked_at: dict[str, float]. Last scrape time (epoch seconds) per slug
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(checked_at, file)
+    os.replace(tmp_path, path)
+
+
 # Runtime
 if __name__ == "__main__":
     main(
@@ -0,0 +1,34 @@
+WITH slugs AS (
+  SELECT UNNEST(%(code)s::TEXT[]) AS code
+),
+recent_chapters AS (
+  SELECT
+    m.code,
+    mc.chapter_updated_at,
+    ROW_NUMBER() OVER (PARTITION BY mc.manga_id ORDER BY mc.chapter_updated_at DESC) AS rn
+  FROM manga.manga_chapters AS mc
+  JOIN manga.mangas AS m
+    ON m.id = mc.manga_id
+  WHERE m.code = ANY(%(code)s::TEXT[])
+),
+cadences AS (
+  SELECT
+    code,
+    COUNT(*) AS chapter_count,
+    EXTRACT(EPOCH FROM MAX(chapter_updated_at) - MIN(chapter_updated_at)) / NULLIF(COUNT(*) - 1, 0) AS avg_interval,
+    EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP AT TIME ZONE 'WAST') - MAX(chapter_updated_at)) AS since_last_chapter
+  FROM recent_chapters
+  WHERE rn <= %(window)s
+  GROUP BY code
+)
+SELECT
+  s.code,
+  COALESCE(m.is_completed, FALSE) AS is_completed,
+  COALESCE(c.chapter_count, 0) AS chapter_count,
+  c.avg_interval,
+  c.since_last_chapter
+FROM slugs AS s
+LEFT JOIN manga.mangas AS m
+  ON m.code = s.code
+LEFT JOIN cadences AS c
+  ON c.code = s.code;
@@ -1,16 +1,17 @@
 import os
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from revi_toolbox.adapters import PostgreAdapter
-from revi_toolbox.scraper.manga import MangabatsScraperRunner
 
-from prefect import flow, task
+from prefect import flow, task, unmapped
 from prefect.variables import Variable
 from prefect.blocks.system import Secret
 
-from shared.macro import gen_job_id, get_query, parse_job_id
+from shared.macro import chunk_list, gen_job_id, get_query, parse_job_id
+from shared.scraper_archive import get_archive_path
 from shared.scraper_logs import load_log
 
+from flows.manga.mangabats import PageArchive, merge_batch_results, open_page_archive, parse_overview, run_scraper
 from flows.manga.schemas import RawManga
 
 
@@ -22,12 +23,23 @@ QUERY_DIR = os.path.join(os.path.dirname(__file__), "sql")
     name = "manga_mangabats_scraper_overviews",
     log_prints = True
 )
-def main(slug_list: list[str]):
+def main(
+    slug_list: list[str],
+    archive_mode: Optional[str] = None,
+    archive_job_id: Optional[str] = None,
+    batch_size: Optional[int] = None
+):
     """
     Flow: Running Scraper for MangaBats Manga information
 
+    Live scraping runs fetch and parse together in threads (MangabatsScraperRunner can not be split),
+    so live runs get no CPU parallelism: parsing shares the GIL. Only "replay" parses in a process pool.
+
     params:
         - slug_list: list[str]. List of slug (or Code) for Manga
+        - archive_mode: str. (default: None). Page Archive mode, "record" to save fetched pages or "replay" to scrape from saved pages
+        - archive_job_id: str. (default: None). Job ID of archived run to be replayed (required for "replay" mode)
+        - batch_size: int. (default: None). Number of slug scraped per task run (None to scrape all slug in one task run)
     """
     # Init
     db_auth = Secret.load("scraper-db-auth").get()
@@ -36,44 +48,41 @@ def main(slug_list: list[str]):
 
     job_id = gen_job_id()
 
+    if (archive_mode == "replay" and not archive_job_id):
+        raise ValueError("archive_job_id is required for replay mode")
+    archive_dir = Variable.get("scraper_archive_dir", default="/data/archive")
+    archive_path = get_archive_path(archive_dir, "mangabats_scraper_overviews", archive_job_id if (archive_mode == "replay") else job_id)
+
     # Task: scraping_manga
-    overviews = scraping_manga_overview.map(slug_list).result()
+    with open_page_archive(archive_mode, archive_path) as archive:
+        batches = chunk_list(slug_list, batch_size or len(slug_list))
+        batch_results = scraping_manga_overview.map(batches, unmapped(archive)).result()
+    overviews, errors = merge_batch_results(batch_results)
     
     # Task: load_mangas
-    mangas = load_mangas(db, overviews, job_id)
+    mangas = load_mangas(db, list(overviews.values()), job_id)
 
     # Task: log_scraper
     load_log(db, "scraper-overviews", "mangabats_manga_scraper_overview", job_id, wait_for=[mangas])
 
+    if (errors):
+        raise RuntimeError(f"Failed scraping {len(errors)} slug: [{', '.join(errors)}]")
+
 
 # Tasks
 @task(retries=0)
-def scraping_manga_overview(slug: str) -> RawManga:
+def scraping_manga_overview(slug_list: List[str], archive: PageArchive = None) -> Tuple[Dict[str, RawManga], Dict[str, str]]:
     """
-    Task: Scraping Manga per slug
+    Task: Scraping Manga for a batch of slug (live: threads, no CPU parallelism; replay: parse in process pool)
 
     params:
-        - slug: str. Slug (or Code) for Overview
+        - slug_list: list[str]. List of slug (or Code) for Overview
+        - archive: PageArchiveWriter | PageArchiveReader. (default: None). Page Archive to record to or replay from
     
     return:
-        Manga scraping results
+        Manga scraping results per slug, and error message per failed slug
     """
-    # Scraping
-    scraper = MangabatsScraperRunner()
-    overview = scraper.scrape_overview(slug)
-
-    # Re-formatting
-    author_list = ";".join(sorted(overview.authors))
-    genre_list = ";".join(sorted(overview.genres))
-    is_completed = "TRUE" if (overview.is_completed) else "FALSE"
-
-    m = RawManga.model_validate({
-        "author_list": author_list,
-        "genre_list": genre_list,
-        "is_completed": is_completed,
-        **overview.model_dump(include=["code", "title"])
-    })
-    return m
+    return run_scraper(slug_list, parse_overview, archive)
 
 
 @task(retries=0)
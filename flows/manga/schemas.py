@@ -58,3 +58,12 @@ class MangaChapter(BaseModel):
     chapter_title: str
     chapter_url: str
     chapter_updated_at: datetime
+    freshness_lag: Optional[float] = None
+
+
+class MangaScrapeStat(BaseModel):
+    code: str
+    is_completed: bool
+    chapter_count: int
+    avg_interval: Optional[float] = None
+    since_last_chapter: Optional[float] = None
@@ -7,10 +7,11 @@ from prefect import flow, task
 from prefect.blocks.system import Secret
 from prefect.variables import Variable
 
-from shared.macro import gen_job_id, get_query, parse_job_id, remove_duplicate
+from shared.macro import gen_job_id, get_query, parse_job_id
+from shared.metrics import record_freshness
 from shared.scraper_logs import fetch_new_job_id, mark_job_id
 
-from flows.manga.schemas import Manga, MangaChapter, RawMangaChapter
+from flows.manga.schemas import MangaChapter, RawMangaChapter
 
 QUERY_DIR = os.path.join(os.path.dirname(__file__), "sql")
 
@@ -44,11 +45,11 @@ def main(scraper_job_id: List[str]):
     if (not raw_chapters):
         return
     
-    # Task: fetch_mangas
-    mangas = fetch_mangas_by_code(db, raw_chapters)
-
     # Task: sync_manga_chapters
-    manga_chapters = sync_manga_chapters(db, raw_chapters, mangas, job_id)
+    manga_chapters = sync_manga_chapters(db, raw_chapters, job_id)
+
+    # Task: record_freshness
+    record_freshness("manga-chapters", [ch.freshness_lag for ch in manga_chapters if ch.freshness_lag is not None])
 
     # Task: mark_is_complete
     processed_at = parse_job_id(job_id)
@@ -59,7 +60,7 @@ def main(scraper_job_id: List[str]):
 @task(retries=0)
 def fetch_raw_chapters(db: PostgreAdapter, scraper_job_id: List[str]) -> List[RawMangaChapter]:
     """
-    Task: Fetch Raw Manga Chapter scraping results
+    Task: Fetch Raw Manga Chapter scraping results (latest snapshot per Manga Chapter across Job ID)
 
     params:
         - db: PostgreAdapter. Adapter for interacting with Postgre DB
@@ -81,38 +82,16 @@ def fetch_raw_chapters(db: PostgreAdapter, scraper_job_id: List[str]) -> List[Ra
 
 
 @task(retries=0)
-def fetch_mangas_by_code(db: PostgreAdapter, chapters: List[RawMangaChapter]) -> List[Manga]:
-    """
-    Task: Fetch Mangas based on chapters Manga code
-
-    params:
-        - db: PostgreAdapter. Adapter for interacting with Postgre DB
-        - chapters: list[RawMangaChapter]. List of raw Manga Chapter object
-    
-    return:
-        List of Manga object
-    """
-    print("Fetch Mangas")
-
-    # Prepare Query and Params
-    query = get_query(QUERY_DIR, "fetch_mangas_by_code.sql")
-    params = {"code": tuple(map(lambda c: c.code, chapters))}
-
-    # Fetch Results
-    mangas = [Manga.model_validate(r) for r in db.run_query(query, params)]
-    print(f"Collected {len(mangas)} Manga records")
-    return mangas
-
-
-@task(retries=0)
-def sync_manga_chapters(db: PostgreAdapter, chapters: List[RawMangaChapter], mangas: List[Manga], job_id: str) -> List[MangaChapter]:
+def sync_manga_chapters(db: PostgreAdapter, chapters: List[RawMangaChapter], job_id: str) -> List[MangaChapter]:
     """
     Task: Sync Manga Chapters data (manga.manga_chapters) with new chapters data
 
+    Chapters are sent once as arrays and mapped to Manga by code in DB. Chapters
+    without Manga are loaded to manga.undefined_manga_chapters in the same query.
+
     params:
         - db: PostgreAdapter. Adapter for interacting with Postgre DB
         - chapters: list[RawMangaChapter]. List of raw Manga Chapter object
-        - mangas: list[Manga]. List of Manga object
         - job_id: str. Data processing Job ID
 
     returns:
@@ -120,33 +99,19 @@ def sync_manga_chapters(db: PostgreAdapter, chapters: List[RawMangaChapter], man
     """
     print("Sync Manga Chapters data")
 
-    # Mapping Chapters with Manga 
-    mapped_raw_chapters = []
-    for ch in chapters:
-        fltr_manga_id = list(filter(lambda m: m.code == ch.code, mangas))
-        manga_id = fltr_manga_id[0].id if (fltr_manga_id) else None
-        __mrc = {
-            "manga_id": manga_id,
-            "job_id": job_id,
-            **ch.model_dump()
-        }
-        mapped_raw_chapters.append(__mrc)
-
-    mapped_raw_chapters = remove_duplicate(mapped_raw_chapters, unique_key=["manga_code", "chapter_url"])
-
-    # Upsert Manga Chapters (defined)
-    def_manga_chapters = list(filter(lambda m: m["manga_id"] is not None, mapped_raw_chapters))
-    ups_def_query = get_query(QUERY_DIR, "upsert_manga_chapters.sql")
-    def_manga_chapters_upt = [MangaChapter.model_validate(r) for r in db.run_query(ups_def_query, def_manga_chapters)]
-
-    # Upsert Manga Chapter (undefined)
-    udf_manga_chapters_upt = []
-    udf_manga_chapters = list(filter(lambda m: m["manga_id"] is None, mapped_raw_chapters))
-    if (udf_manga_chapters):
-        print("Sync Undefined Manga Chapters")
-        ups_udf_query = get_query(QUERY_DIR, "upsert_undefined_manga_chapters.sql")
-        udf_manga_chapters_upt = [MangaChapter.model_validate(r) for r in db.run_query(ups_udf_query, udf_manga_chapters)]
-
-    manga_chapters = def_manga_chapters_upt + udf_manga_chapters_upt
-    print(f"Finish Sync {len(manga_chapters)} record(s) ({len(udf_manga_chapters_upt)} record(s) with undefined Manga)")
+    # Prepare Query and Params
+    query = get_query(QUERY_DIR, "upsert_manga_chapters.sql")
+    params = {
+        "code": [ch.code for ch in chapters],
+        "chapter_title": [ch.chapter_title for ch in chapters],
+        "chapter_url": [ch.chapter_url for ch in chapters],
+        "chapter_updated_at": [ch.chapter_updated_at for ch in chapters],
+        "job_id": job_id
+    }
+
+    # Run Query
+    manga_chapters = [MangaChapter.model_validate(r) for r in db.run_query(query, params)]
+    udf_manga_chapters = list(filter(lambda m: m.manga_id is None, manga_chapters))
+
+    print(f"Finish Sync {len(manga_chapters)} record(s) ({len(udf_manga_chapters)} record(s) with undefined Manga)")
     return manga_chapters
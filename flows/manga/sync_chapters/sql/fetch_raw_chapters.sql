@@ -1,7 +1,8 @@
-SELECT
+SELECT DISTINCT ON (code, chapter_url)
   code,
   chapter_title,
   chapter_url,
   chapter_updated_at
 FROM manga_src.raw_manga_chapters
-WHERE job_id IN %(job_id)s;
+WHERE job_id IN %(job_id)s
+ORDER BY code, chapter_url, job_id DESC;
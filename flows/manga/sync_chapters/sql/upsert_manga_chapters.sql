@@ -1,22 +1,92 @@
-INSERT INTO manga.manga_chapters (
-  manga_id,
-  chapter_title,
-  chapter_url,
-  chapter_updated_at,
-  created_at,
-  modified_at,
-  job_id
+WITH raw_chapters AS (
+  SELECT DISTINCT ON (code, chapter_url)
+    code,
+    chapter_title,
+    chapter_url,
+    chapter_updated_at
+  FROM UNNEST(
+    %(code)s::TEXT[],
+    %(chapter_title)s::TEXT[],
+    %(chapter_url)s::TEXT[],
+    %(chapter_updated_at)s::TIMESTAMP[]
+  ) AS rc (code, chapter_title, chapter_url, chapter_updated_at)
+  ORDER BY code, chapter_url, chapter_updated_at DESC
+),
+defined_chapters AS (
+  INSERT INTO manga.manga_chapters (
+    manga_id,
+    chapter_title,
+    chapter_url,
+    chapter_updated_at,
+    created_at,
+    modified_at,
+    job_id
+  )
+  SELECT
+    m.id,
+    rc.chapter_title,
+    rc.chapter_url,
+    rc.chapter_updated_at,
+    CURRENT_TIMESTAMP AT TIME ZONE 'WAST',
+    CURRENT_TIMESTAMP AT TIME ZONE 'WAST',
+    %(job_id)s
+  FROM raw_chapters AS rc
+  JOIN manga.mangas AS m
+    ON m.code = rc.code
+  ON CONFLICT (manga_id, chapter_url) DO
+    UPDATE SET
+      chapter_title = EXCLUDED.chapter_title,
+      chapter_updated_at = EXCLUDED.chapter_updated_at,
+      modified_at = EXCLUDED.modified_at,
+      job_id = EXCLUDED.job_id
+  RETURNING
+    id,
+    manga_id,
+    NULL::TEXT AS manga_code,
+    chapter_title,
+    chapter_url,
+    chapter_updated_at,
+    CASE WHEN xmax = 0 THEN EXTRACT(EPOCH FROM created_at - chapter_updated_at) END AS freshness_lag
+),
+undefined_chapters AS (
+  INSERT INTO manga.undefined_manga_chapters (
+    manga_code,
+    chapter_title,
+    chapter_url,
+    chapter_updated_at,
+    created_at,
+    modified_at,
+    job_id
+  )
+  SELECT
+    rc.code,
+    rc.chapter_title,
+    rc.chapter_url,
+    rc.chapter_updated_at,
+    CURRENT_TIMESTAMP AT TIME ZONE 'WAST',
+    CURRENT_TIMESTAMP AT TIME ZONE 'WAST',
+    %(job_id)s
+  FROM raw_chapters AS rc
+  WHERE NOT EXISTS (
+    SELECT 1
+    FROM manga.mangas AS m
+    WHERE m.code = rc.code
+  )
+  ON CONFLICT (manga_code, chapter_url) DO
+    UPDATE SET
+      chapter_title = EXCLUDED.chapter_title,
+      chapter_updated_at = EXCLUDED.chapter_updated_at,
+      modified_at = EXCLUDED.modified_at,
+      job_id = EXCLUDED.job_id
+  RETURNING
+    id,
+    NULL::INTEGER AS manga_id,
+    manga_code,
+    chapter_title,
+    chapter_url,
+    chapter_updated_at,
+    NULL::NUMERIC AS freshness_lag
 )
-VALUES (%(manga_id)s, %(chapter_title)s, %(chapter_url)s, %(chapter_updated_at)s, CURRENT_TIMESTAMP AT TIME ZONE 'WAST', CURRENT_TIMESTAMP AT TIME ZONE 'WAST', %(job_id)s)
-ON CONFLICT (manga_id, chapter_url) DO
-  UPDATE SET
-    chapter_title = EXCLUDED.chapter_title,
-    chapter_updated_at = EXCLUDED.chapter_updated_at,
-    modified_at = EXCLUDED.modified_at,
-    job_id = EXCLUDED.job_id
-RETURNING
-  id,
-  manga_id,
-  chapter_title,
-  chapter_urL,
-  chapter_updated_at;
+SELECT * FROM defined_chapters
+UNION ALL
+SELECT * FROM undefined_chapters;
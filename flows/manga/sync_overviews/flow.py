@@ -7,10 +7,12 @@ from prefect import flow, task
 from prefect.variables import Variable
 from prefect.blocks.system import Secret
 
+from shared.dimension_cache import DimensionCache
 from shared.macro import gen_job_id, get_query, parse_job_id, remove_duplicate
+from shared.metrics import record_freshness
 from shared.scraper_logs import fetch_new_job_id, mark_job_id
 
-from flows.manga.schemas import Author, Genre, Manga, MangaAuthor, MangaGenre, RawManga
+from flows.manga.schemas import Author, Genre, Manga, MangaAuthor, MangaChapter, MangaGenre, RawManga
 
 
 QUERY_DIR = os.path.join(os.path.dirname(__file__), "sql")
@@ -21,12 +23,13 @@ QUERY_DIR = os.path.join(os.path.dirname(__file__), "sql")
     name = "manga_sync_overviews",
     log_prints = True
 )
-def main(scraper_job_id: List[str]):
+def main(scraper_job_id: List[str], refresh_cache: bool = False):
     """
     Flow: Running Sync task to Update/Insert Manga Overviews information
 
     params:
         - scraper_job_id: list[int]. List of Scraper Job ID to be processed
+        - refresh_cache: bool. (default: False). Invalidate Author and Genre ID cache before sync
     """
     # Init
     db_auth = Secret.load("scraper-db-auth").get()
@@ -35,6 +38,15 @@ def main(scraper_job_id: List[str]):
 
     job_id = gen_job_id()
 
+    cache_dir = Variable.get("scraper_cache_dir", default="/data/cache")
+    author_cache = DimensionCache(os.path.join(cache_dir, "manga_authors.json"))
+    genre_cache = DimensionCache(os.path.join(cache_dir, "manga_genres.json"))
+    if (refresh_cache):
+        author_cache.invalidate()
+        author_cache.save()
+        genre_cache.invalidate()
+        genre_cache.save()
+
     # Task: fetch_new_job_id
     scraper_job_id = scraper_job_id if (scraper_job_id) else fetch_new_job_id(db, "scraper-overviews")
     if (not scraper_job_id):
@@ -47,29 +59,35 @@ def main(scraper_job_id: List[str]):
     
     # Task: sync_mangas
     mangas = sync_mangas(db, raw_overviews, job_id)
+
+    # Task: promote_undefined_manga_chapters
+    promoted_chapters = promote_undefined_manga_chapters(db, job_id, wait_for=[mangas])
+
+    # Task: record_freshness
+    record_freshness("manga-promoted-chapters", [ch.freshness_lag for ch in promoted_chapters if ch.freshness_lag is not None])
     
     # Task: sync_authors
-    authors = sync_authors(db, raw_overviews, job_id)
+    authors = sync_authors(db, raw_overviews, job_id, author_cache)
 
     # Task: sync_manga_authors
     manga_authors = sync_manga_authors(db, raw_overviews, mangas, authors, job_id)
 
     # Task: sync_genres
-    genres = sync_genres(db, raw_overviews, job_id)
+    genres = sync_genres(db, raw_overviews, job_id, genre_cache)
 
     # Task: sync_manga_genres
     manga_genres = sync_manga_genres(db, raw_overviews, mangas, genres, job_id)
 
     # Task: mark_scraper_log
     processed_at = parse_job_id(job_id)
-    mark_job_id(db, "scraper-overviews", scraper_job_id, processed_at, wait_for=[manga_authors, manga_genres])
+    mark_job_id(db, "scraper-overviews", scraper_job_id, processed_at, wait_for=[manga_authors, manga_genres, promoted_chapters])
 
 
 # Tasks
 @task(retries=0)
 def fetch_raw_overviews(db: PostgreAdapter, scraper_job_id: List[str]) -> List[RawManga]:
     """
-    Task: Fetch Raw Manga Overview scraping results
+    Task: Fetch Raw Manga Overview scraping results (latest snapshot per Manga across Job ID)
 
     params:
         - db: PostgreAdapter. Adapter for interacting with Postgre DB
@@ -106,10 +124,7 @@ def sync_mangas(db: PostgreAdapter, overviews: List[RawManga], job_id: str) -> L
     print("Sync Mangas data")
     
     query = get_query(QUERY_DIR, "upsert_mangas.sql")
-    data = remove_duplicate(
-        [{"job_id": job_id, **o.model_dump()} for o in overviews],
-        unique_key = ["code"]
-    )
+    data = [{"job_id": job_id, **o.model_dump()} for o in overviews]
     mangas = [Manga.model_validate(r) for r in db.run_query(query, data)]
     
     print(f"Finish Sync {len(mangas)} Manga record(s)")
@@ -117,32 +132,57 @@ def sync_mangas(db: PostgreAdapter, overviews: List[RawManga], job_id: str) -> L
 
 
 @task(retries=0)
-def sync_authors(db: PostgreAdapter, overviews: List[RawManga], job_id: str) -> List[Author]:
+def promote_undefined_manga_chapters(db: PostgreAdapter, job_id: str) -> List[MangaChapter]:
     """
-    Task: Sync Authors data (manga.authors) with new overview data
+    Task: Move Undefined Manga Chapters (manga.undefined_manga_chapters) which Manga already exists to Manga Chapters (manga.manga_chapters)
+
+    params:
+        - db: PostgreAdapter. Adapter for interacting with Postgre DB
+        - job_id: str. Data processing Job ID
+
+    return:
+        Promoted Manga Chapters
+    """
+    print("Promote Undefined Manga Chapters data")
+
+    query = get_query(QUERY_DIR, "promote_undefined_manga_chapters.sql")
+    params = {"job_id": job_id}
+    manga_chapters = [MangaChapter.model_validate(r) for r in db.run_query(query, params)]
+
+    print(f"Finish Promote {len(manga_chapters)} Manga Chapter record(s)")
+    return manga_chapters
+
+
+@task(retries=0)
+def sync_authors(db: PostgreAdapter, overviews: List[RawManga], job_id: str, cache: DimensionCache) -> List[Author]:
+    """
+    Task: Sync Authors data (manga.authors) with new overview data (only Author missing from cache)
 
     params:
         - db: PostgreAdapter. Adapter for interacting with Postgre DB
         - overviews: list[RawManga]. List of Manga overview object
         - job_id: str. Data processing Job ID
+        - cache: DimensionCache. Author name to ID cache
 
     return:
-        Updated/loaded Authors
+        Cached and updated/loaded Authors
     """
     print("Sync Authors data")
 
-    query = get_query(QUERY_DIR, "upsert_authors.sql")
-    data = remove_duplicate(
-        [
-            {"name": n, "job_id": job_id}
-            for m in overviews
-            for n in m.author_list.split(";")
-        ],
-        unique_key = ["name"]
-    )
-    authors = [Author.model_validate(r) for r in db.run_query(query, data)]
+    names = sorted(set(n for m in overviews for n in m.author_list.split(";")))
+    cached, missing = cache.get_many(names)
+    authors = [Author(id=i, name=n) for n, i in cached.items()]
+
+    if (missing):
+        query = get_query(QUERY_DIR, "upsert_authors.sql")
+        data = [{"name": n, "job_id": job_id} for n in missing]
+        new_authors = [Author.model_validate(r) for r in db.run_query(query, data)]
+
+        cache.update({a.name: a.id for a in new_authors})
+        cache.save()
+        authors += new_authors
     
-    print(f"Finish Sync {len(authors)} Author record(s)")
+    print(f"Finish Sync {len(authors)} Author record(s) ({len(missing)} not cached)")
     return authors
 
 
@@ -197,29 +237,35 @@ def sync_manga_authors(
 
 
 @task(retries=0)
-def sync_genres(db: PostgreAdapter, overviews: List[RawManga], job_id: str) -> List[Genre]:
+def sync_genres(db: PostgreAdapter, overviews: List[RawManga], job_id: str, cache: DimensionCache) -> List[Genre]:
     """
-    Task: Sync Genres data (manga.genres) with new overview data
+    Task: Sync Genres data (manga.genres) with new overview data (only Genre missing from cache)
 
     params:
         - db: PostgreAdapter. Adapter for interacting with Postgre DB
         - overviews: list[RawManga]. List of Manga overview object
         - job_id: str. Data processing Job ID
+        - cache: DimensionCache. Genre name to ID cache
+
+    return:
+        Cached and updated/loaded Genres
     """
     print("Sync Genres data")
+
+    names = sorted(set(n for m in overviews for n in m.genre_list.split(";")))
+    cached, missing = cache.get_many(names)
+    genres = [Genre(id=i, name=n) for n, i in cached.items()]
+
+    if (missing):
+        query = get_query(QUERY_DIR, "upsert_genres.sql")
+        data = [{"name": n, "job_id": job_id} for n in missing]
+        new_genres = [Genre.model_validate(r) for r in db.run_query(query, data)]
+
+        cache.update({g.name: g.id for g in new_genres})
+        cache.save()
+        genres += new_genres
     
-    query = get_query(QUERY_DIR, "upsert_genres.sql")
-    data = remove_duplicate(
-        [
-            {"name": n, "job_id": job_id}
-            for m in overviews
-            for n in m.genre_list.split(";")
-        ],
-        unique_key = ["name"]
-    )
-    genres = [Genre.model_validate(r) for r in db.run_query(query, data)]
-    
-    print(f"Finish Sync {len(genres)} Genre record(s)")
+    print(f"Finish Sync {len(genres)} Genre record(s) ({len(missing)} not cached)")
     return genres
 
 
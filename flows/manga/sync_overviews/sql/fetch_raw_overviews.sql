@@ -1,4 +1,4 @@
-SELECT
+SELECT DISTINCT ON (code)
   id,
   code,
   title,
@@ -6,4 +6,5 @@ SELECT
   genre_list,
   is_completed
 FROM manga_src.raw_mangas
-WHERE job_id IN %(job_id)s;
+WHERE job_id IN %(job_id)s
+ORDER BY code, job_id DESC, id DESC;
@@ -0,0 +1,42 @@
+WITH resolved_chapters AS (
+  DELETE FROM manga.undefined_manga_chapters AS umc
+  USING manga.mangas AS m
+  WHERE umc.manga_code = m.code
+  RETURNING
+    m.id AS manga_id,
+    umc.chapter_title,
+    umc.chapter_url,
+    umc.chapter_updated_at
+)
+INSERT INTO manga.manga_chapters (
+  manga_id,
+  chapter_title,
+  chapter_url,
+  chapter_updated_at,
+  created_at,
+  modified_at,
+  job_id
+)
+SELECT
+  manga_id,
+  chapter_title,
+  chapter_url,
+  chapter_updated_at,
+  CURRENT_TIMESTAMP AT TIME ZONE 'WAST',
+  CURRENT_TIMESTAMP AT TIME ZONE 'WAST',
+  %(job_id)s
+FROM resolved_chapters
+ON CONFLICT (manga_id, chapter_url) DO
+  UPDATE SET
+    chapter_title = EXCLUDED.chapter_title,
+    chapter_updated_at = EXCLUDED.chapter_updated_at,
+    modified_at = EXCLUDED.modified_at,
+    job_id = EXCLUDED.job_id
+  WHERE manga.manga_chapters.chapter_updated_at < EXCLUDED.chapter_updated_at
+RETURNING
+  id,
+  manga_id,
+  chapter_title,
+  chapter_url,
+  chapter_updated_at,
+  CASE WHEN xmax = 0 THEN EXTRACT(EPOCH FROM created_at - chapter_updated_at) END AS freshness_lag;
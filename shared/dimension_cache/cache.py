@@ -0,0 +1,81 @@
+import os
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class DimensionCache:
+    """
+    Read-through cache for dimension key (e.g. name) to ID mapping, persisted as local JSON file
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._data: Dict[str, int] = self._load()
+        self._is_dirty = False
+
+    def _load(self) -> Dict[str, int]:
+        if (not os.path.exists(self.path)):
+            return {}
+        try:
+            with open(self.path, "r") as file:
+                return {str(k): int(v) for k, v in json.load(file).items()}
+        except (ValueError, TypeError, AttributeError):
+            return {}
+
+    def get_many(self, keys: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """
+        Get cached IDs for keys
+
+        params:
+            - keys: Iterable[str]. Dimension keys
+
+        return:
+            Mapping of cached keys to ID, and list of keys missing from cache
+        """
+        found, missing = {}, []
+        for k in keys:
+            if (k in self._data):
+                found[k] = self._data[k]
+            else:
+                missing.append(k)
+        return found, missing
+
+    def update(self, mapping: Dict[str, int]):
+        """
+        Add or replace cached IDs
+
+        params:
+            - mapping: dict[str, int]. Mapping of dimension keys to ID
+        """
+        self._data.update(mapping)
+        self._is_dirty = True
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None):
+        """
+        Remove keys from cache
+
+        params:
+            - keys: Iterable[str]. (default: None). Dimension keys to be removed (None to clear all)
+        """
+        if (keys is None):
+            self._data.clear()
+        else:
+            for k in keys:
+                self._data.pop(k, None)
+        self._is_dirty = True
+
+    def save(self):
+        """
+        Persist cache to file (only when changed)
+        """
+        if (not self._is_dirty):
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self._data, file)
+        os.replace(tmp_path, self.path)
+        self._is_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -49,6 +49,21 @@ def parse_job_id(job_id: str) -> datetime:
     return __job_id
 
 
+def chunk_list(data: list, size: int) -> List[list]:
+    """
+    Helper function to split list into chunks
+
+    params:
+        - data: list. List of data
+        - size: int. Maximum chunk size
+    
+    return:
+        List of chunks
+    """
+    size = max(1, size)
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
 def remove_duplicate(data: List[dict], unique_key: List[str], order_by: str = "job_id", desc: bool = True) -> List[dict]:
     """
     Helper function to remove duplicate from list of data
@@ -0,0 +1 @@
+from .task import record_freshness
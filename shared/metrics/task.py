@@ -0,0 +1,43 @@
+from typing import List, Optional
+
+from prefect import task
+from prefect.artifacts import create_table_artifact
+
+
+def _percentile(data: List[float], pct: float) -> float:
+    idx = max(0, min(len(data) - 1, round(pct / 100 * len(data)) - 1))
+    return data[idx]
+
+
+@task(retries=0)
+def record_freshness(name: str, lags: List[float]) -> Optional[dict]:
+    """
+    Task: Record data freshness (lag from source update time to landing in Database)
+
+    params:
+        - name: str. Metric name (lowercase, dash separated)
+        - lags: list[float]. Lag per loaded record (in seconds)
+
+    return:
+        Freshness summary (in seconds), None if no record loaded
+    """
+    if (not lags):
+        print(f"No new record for {name} freshness")
+        return None
+
+    lags = sorted(lags)
+    summary = {
+        "count": len(lags),
+        "min": round(lags[0], 1),
+        "p50": round(_percentile(lags, 50), 1),
+        "p95": round(_percentile(lags, 95), 1),
+        "max": round(lags[-1], 1)
+    }
+    print(f"Freshness {name} (seconds): {summary}")
+
+    create_table_artifact(
+        key = f"{name}-freshness",
+        table = [summary],
+        description = f"Lag (in seconds) from source update time to landing in Database for {name}"
+    )
+    return summary
@@ -0,0 +1,8 @@
+from .archive import (
+    PageArchiveReader,
+    PageArchiveWriter,
+    archive_slug,
+    get_archive_path,
+    record_pages,
+    serve_pages
+)
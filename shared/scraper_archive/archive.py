@@ -0,0 +1,252 @@
+import os
+import json
+import mmap
+import zlib
+import hashlib
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+# Archive file layout:
+#   MAGIC | page_0 | page_1 | ... | index | footer
+# Each page is a zlib-compressed response body (identical bodies are stored once), index is a
+# zlib-compressed JSON list with one entry per (slug, "<METHOD> <URL>") pointing to the body offset,
+# and footer stores the index offset and length.
+MAGIC = b"RPGA\x01"
+FOOTER = struct.Struct("<QQ")
+ARCHIVE_EXT = ".pages"
+
+# Slug being scraped by current thread, used to tag recorded pages
+_thread_slug = threading.local()
+
+
+def get_archive_path(archive_dir: str, name: str, job_id: str) -> str:
+    """
+    Generate Page Archive path for a Job
+
+    params:
+        - archive_dir: str. Root directory of Page Archives
+        - name: str. Job name
+        - job_id: str. Job ID of scraper job
+
+    return:
+        Path of Page Archive file
+    """
+    return os.path.join(archive_dir, name, f"{job_id}{ARCHIVE_EXT}")
+
+
+def _page_key(method: str, url: str) -> str:
+    return f"{method.upper()} {url}"
+
+
+def _build_response(page: dict, request: requests.PreparedRequest) -> requests.Response:
+    response = requests.Response()
+    response.status_code = page["status_code"]
+    response.headers = CaseInsensitiveDict(page["headers"])
+    response.encoding = page["encoding"]
+    response.url = page["url"]
+    response.request = request
+    response._content = page["content"]
+    return response
+
+
+@contextmanager
+def _patch_send(send: Callable[..., requests.Response]) -> Iterator[None]:
+    original_send = requests.Session.send
+    requests.Session.send = send
+    try:
+        yield
+    finally:
+        requests.Session.send = original_send
+
+
+class PageArchiveWriter:
+    """
+    Writer for recording fetched pages into a single compressed archive file
+    """
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._index: Dict[Tuple[Optional[str], str], dict] = {}
+        self._blobs: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        status_code: int,
+        content: bytes,
+        encoding: Optional[str] = None,
+        headers: Optional[dict] = None,
+        slug: Optional[str] = None
+    ):
+        """
+        Append page to archive (latest fetch wins for the same slug and request)
+
+        params:
+            - method: str. Request HTTP method
+            - url: str. Request URL
+            - status_code: int. Response status code
+            - content: bytes. Raw response body
+            - encoding: str. (default: None). Response encoding
+            - headers: dict. (default: None). Response headers
+            - slug: str. (default: None). Slug (or Code) the page was fetched for
+        """
+        digest = hashlib.sha1(content).hexdigest()
+        key = _page_key(method, url)
+        with self._lock:
+            if (digest not in self._blobs):
+                compressed = zlib.compress(content)
+                self._blobs[digest] = (self._file.tell(), len(compressed))
+                self._file.write(compressed)
+
+            offset, length = self._blobs[digest]
+            self._index[(slug, key)] = {
+                "key": key,
+                "url": url,
+                "slug": slug,
+                "offset": offset,
+                "length": length,
+                "status_code": status_code,
+                "encoding": encoding,
+                "headers": headers or {}
+            }
+
+    def close(self):
+        """
+        Write index and footer, then close archive file
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            index = zlib.compress(json.dumps(list(self._index.values())).encode("utf-8"))
+            index_offset = self._file.tell()
+            self._file.write(index)
+            self._file.write(FOOTER.pack(index_offset, len(index)))
+            self._file.close()
+
+    def __enter__(self) -> "PageArchiveWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PageArchiveReader:
+    """
+    Memory-mapped reader for pages recorded by PageArchiveWriter
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Invalid Page Archive file: {path}")
+
+        index_offset, index_length = FOOTER.unpack(self._mm[-FOOTER.size:])
+        self._index: List[dict] = json.loads(zlib.decompress(self._mm[index_offset:index_offset + index_length]))
+
+    def get_pages(self, slug: str) -> Dict[str, dict]:
+        """
+        Read every archived page fetched for a slug (untagged pages are served to every slug)
+
+        params:
+            - slug: str. Slug (or Code) for Manga
+
+        return:
+            Pages keyed by "<METHOD> <URL>", servable with `serve_pages`
+        """
+        # Untagged pages first, so pages tagged with the slug take precedence
+        entries = sorted(
+            (e for e in self._index if e.get("slug") in (slug, None)),
+            key = lambda e: e.get("slug") is not None
+        )
+        return {
+            entry["key"]: {
+                **{k: entry[k] for k in ("url", "status_code", "encoding", "headers")},
+                "content": zlib.decompress(self._mm[entry["offset"]:entry["offset"] + entry["length"]])
+            }
+            for entry in entries
+        }
+
+    def close(self):
+        """
+        Close archive file
+        """
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "PageArchiveReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def archive_slug(slug: str) -> Iterator[None]:
+    """
+    Tag pages recorded by current thread with a slug
+
+    params:
+        - slug: str. Slug (or Code) for Manga
+    """
+    _thread_slug.value = slug
+    try:
+        yield
+    finally:
+        _thread_slug.value = None
+
+
+@contextmanager
+def record_pages(path: str) -> Iterator[PageArchiveWriter]:
+    """
+    Record every page fetched through `requests` into Page Archive, tagged with the slug set by `archive_slug`
+
+    params:
+        - path: str. Page Archive file path
+    """
+    original_send = requests.Session.send
+
+    def send(session: requests.Session, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = original_send(session, request, **kwargs)
+        writer.add(
+            request.method,
+            request.url,
+            response.status_code,
+            response.content,
+            encoding = response.encoding,
+            headers = {"Content-Type": response.headers.get("Content-Type", "")},
+            slug = getattr(_thread_slug, "value", None)
+        )
+        return response
+
+    with PageArchiveWriter(path) as writer, _patch_send(send):
+        yield writer
+
+
+@contextmanager
+def serve_pages(pages: Dict[str, dict]) -> Iterator[None]:
+    """
+    Serve every page requested through `requests` from archived pages (no network access)
+
+    params:
+        - pages: dict[str, dict]. Pages keyed by "<METHOD> <URL>"
+    """
+    def send(session: requests.Session, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = _page_key(request.method, request.url)
+        if key not in pages:
+            raise KeyError(f"Page is not archived: {key}")
+        return _build_response(pages[key], request)
+
+    with _patch_send(send):
+        yield
@@ -3,18 +3,20 @@ from typing import List
 from datetime import datetime
 
 from prefect import task
+from prefect.events import emit_event
 
 from revi_toolbox.adapters import PostgreAdapter
 
 from shared.macro import get_query, parse_job_id
 
 QUERY_DIR = os.path.join(os.path.dirname(__file__), "sql")
+EVENT_SCRAPER_COMPLETED = "revirathya.scraper.completed"
 
 
 @task(retries=0)
 def load_log(db: PostgreAdapter, service: str, name: str, runtime_job_id: str):
     """
-    Task: Loading Log to Database
+    Task: Loading Log to Database and emit scraper completion event
 
     params:
         - db: PostgreAdapter. Adapter for interacting with Postgre DB
@@ -33,6 +35,19 @@ def load_log(db: PostgreAdapter, service: str, name: str, runtime_job_id: str):
 
     _ = db.run_query(query, data)
 
+    # Emit completion event (triggers matching sync deployment)
+    emit_event(
+        event = EVENT_SCRAPER_COMPLETED,
+        resource = {
+            "prefect.resource.id": f"revirathya.scraper.{service}",
+            "prefect.resource.name": name
+        },
+        payload = {
+            "job_id": runtime_job_id,
+            "job_at": _job_at
+        }
+    )
+
 
 @task(retries=0)
 def fetch_new_job_id(db: PostgreAdapter, service: str) -> List[str]:
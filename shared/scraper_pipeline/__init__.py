@@ -0,0 +1 @@
+from .pipeline import get_parse_pool, reset_parse_pool, run_pipeline
@@ -0,0 +1,159 @@
+import os
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+
+_DONE = object()
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Get process pool for parse stage, shared by every pipeline in the process
+
+    return:
+        Process pool sized to CPU count
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if (_parse_pool is None):
+            _parse_pool = ProcessPoolExecutor(
+                max_workers = os.cpu_count() or 1,
+                mp_context = multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
+
+
+def reset_parse_pool(pool: ProcessPoolExecutor):
+    """
+    Discard broken process pool, so next `get_parse_pool` creates a new one
+
+    params:
+        - pool: ProcessPoolExecutor. Broken process pool
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if (_parse_pool is pool):
+            _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_pipeline(
+    slug_list: List[str],
+    fetch: Callable[[str], Any],
+    parse: Callable[[str, Any], Any],
+    fetch_workers: int = 8,
+    max_pending: Optional[int] = None,
+    return_exceptions: bool = False
+) -> List[Any]:
+    """
+    Run scraping as two stages: I/O-bound fetch (e.g. Page Archive read) in threads and CPU-bound parse in a process pool
+
+    Fetch results are passed through a bounded queue, so fetching pauses when parsing falls behind.
+    `fetch` must not depend on the process pool for network access: the pool is sized for CPU.
+
+    params:
+        - slug_list: list[str]. List of slug (or Code) for Manga
+        - fetch: Callable. Fetch function `fetch(slug) -> pages`, run in threads
+        - parse: Callable. Picklable module-level parse function `parse(slug, pages) -> result`, run in processes
+        - fetch_workers: int. (default: 8). Number of fetch threads
+        - max_pending: int. (default: 2 x CPU count). Maximum fetched pages waiting to be parsed
+        - return_exceptions: bool. (default: False). Return per-slug exception as result instead of raising
+
+    return:
+        List of parse results, ordered as slug_list
+    """
+    parse_pool = get_parse_pool()
+    max_pending = max_pending or (os.cpu_count() or 1) * 2
+
+    fetched: queue.Queue = queue.Queue(maxsize=max_pending)
+    slug_iter = iter(enumerate(slug_list))
+    slug_lock = threading.Lock()
+    stop = threading.Event()
+
+    def put(item: Any):
+        while not stop.is_set():
+            try:
+                fetched.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def fetch_worker():
+        while not stop.is_set():
+            with slug_lock:
+                nxt = next(slug_iter, None)
+            if (nxt is None):
+                break
+            idx, slug = nxt
+            try:
+                put((idx, slug, fetch(slug), None))
+            except Exception as e:
+                put((idx, slug, None, e))
+        put(_DONE)
+
+    n_fetchers = max(1, min(fetch_workers, len(slug_list)))
+    fetchers = [threading.Thread(target=fetch_worker, daemon=True) for _ in range(n_fetchers)]
+    for t in fetchers:
+        t.start()
+
+    results: List[Any] = [None] * len(slug_list)
+    in_flight: Dict[Future, int] = {}
+
+    def set_result(idx: int, result: Any, error: Optional[BaseException]):
+        if (error is None):
+            results[idx] = result
+        elif (return_exceptions):
+            results[idx] = error
+        else:
+            raise error
+
+    def collect(futures):
+        for future in futures:
+            idx = in_flight.pop(future)
+            error = future.exception()
+            if (isinstance(error, BrokenProcessPool)):
+                reset_parse_pool(parse_pool)
+            set_result(idx, None if (error) else future.result(), error)
+
+    def submit(slug: str, pages: Any) -> Future:
+        nonlocal parse_pool
+        try:
+            return parse_pool.submit(parse, slug, pages)
+        except BrokenProcessPool:
+            reset_parse_pool(parse_pool)
+            parse_pool = get_parse_pool()
+            return parse_pool.submit(parse, slug, pages)
+
+    try:
+        n_done = 0
+        while n_done < n_fetchers:
+            item = fetched.get()
+            if (item is _DONE):
+                n_done += 1
+                continue
+
+            idx, slug, pages, error = item
+            if (error is not None):
+                set_result(idx, None, error)
+                continue
+            in_flight[submit(slug, pages)] = idx
+
+            # Backpressure: stop pulling fetched pages until a parse slot frees up
+            if (len(in_flight) >= max_pending):
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(in_flight))
+    finally:
+        stop.set()
+        for future in in_flight:
+            future.cancel()
+
+    return results